@@ -1,17 +1,19 @@
 """CLI: PDF → images → Gemini → print rules JSON."""
 
 import argparse
+import asyncio
 import json
 import os
-import shutil
 import sys
 from pathlib import Path
 
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-from processor import pdf_to_images
+from processor import iter_pdf_images
 
 # -----------------------------------------------------------------------------
 # PROMPT: This is where you tell Gemini what to extract and how the rules
@@ -29,10 +31,79 @@ EXTRACTION_PROMPT = (
     "Do not include any text outside the JSON."
 )
 
-# --- Batch mode (commented out): set BATCH_SIZE to a positive int to send
-#     pages in chunks instead of all at once (helps with quota/rate limits).
-# BATCH_SIZE = 10   # pages per request when batching
-# DELAY_BETWEEN_BATCHES = 2
+# --- Batching: pages are sent in groups of BATCH_SIZE, with at most
+#     MAX_CONCURRENT_REQUESTS in flight and REQUESTS_PER_MINUTE as the quota cap.
+#     Rate-limited (429) and server (5xx) errors are retried with backoff.
+BATCH_SIZE = 10   # pages per request
+MAX_CONCURRENT_REQUESTS = 4
+REQUESTS_PER_MINUTE = 15
+MAX_ATTEMPTS = 5
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _chunked(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, errors.ServerError):
+        return True
+    return isinstance(exc, errors.ClientError) and exc.code == 429
+
+
+def _parse_rules(text: str) -> list | None:
+    """Pull the JSON array (or single object) out of a model response."""
+    text = text.strip()
+    if not (text.startswith("{") or text.startswith("[")):
+        return None
+    # raw_decode stops at the end of the first JSON value, so trailing text
+    # or braces inside strings don't need any slicing.
+    try:
+        parsed, _ = _JSON_DECODER.raw_decode(text)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+async def _extract_batches(client: genai.Client, model: str, image_parts: list) -> list:
+    prompt_part = types.Part.from_text(text=EXTRACTION_PROMPT)
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limiter = AsyncLimiter(REQUESTS_PER_MINUTE, 60)
+
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_exponential(multiplier=2, max=60),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    )
+    async def call(batch: list) -> str:
+        async with sem, limiter:
+            response = await client.aio.models.generate_content(
+                model=model,
+                contents=[prompt_part, *batch],
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+            )
+        return response.text or ""
+
+    batches = _chunked(image_parts, BATCH_SIZE)
+    print(
+        f"Sending {len(batches)} batch(es) of up to {BATCH_SIZE} page(s) to Gemini.",
+        file=sys.stderr,
+    )
+    results = await asyncio.gather(*(call(batch) for batch in batches), return_exceptions=True)
+
+    rules: list = []
+    for n, result in enumerate(results, start=1):
+        if isinstance(result, BaseException):
+            print(f"Batch {n} failed: {result}", file=sys.stderr)
+            continue
+        parsed = _parse_rules(result)
+        if parsed is None:
+            print(f"Batch {n} did not return valid JSON:\n{result}", file=sys.stderr)
+            continue
+        rules.extend(parsed)
+    return rules
 
 
 def main() -> None:
@@ -49,47 +120,17 @@ def main() -> None:
     pdf_path = Path(args.path)
 
     print("Converting PDF to images...", file=sys.stderr)
-    image_paths = pdf_to_images(pdf_path)
-    print(f"Got {len(image_paths)} page(s). Sending all to Gemini in one request.", file=sys.stderr)
-
-    prompt_part = types.Part.from_text(text=EXTRACTION_PROMPT)
-    image_parts = [
-        types.Part.from_bytes(data=p.read_bytes(), mime_type="image/jpeg")
-        for p in image_paths
-    ]
-    contents = [prompt_part, *image_parts]
+    # Pages are rendered one at a time; embed each one as it arrives and
+    # delete the JPEG right away so only the encoded parts stay resident.
+    image_parts = []
+    for p in iter_pdf_images(pdf_path):
+        image_parts.append(types.Part.from_bytes(data=p.read_bytes(), mime_type="image/jpeg"))
+        p.unlink(missing_ok=True)
+    print(f"Got {len(image_parts)} page(s).", file=sys.stderr)
 
     client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-    )
-
-    text = (response.text or "").strip()
-
-    # If response looks like JSON, parse and pretty-print; otherwise print raw
-    if text.startswith("{") or text.startswith("["):
-        start = text.find("{") if "{" in text else text.find("[")
-        end = text.rfind("}") + 1 if "}" in text else text.rfind("]") + 1
-        if end > start:
-            try:
-                parsed = json.loads(text[start:end])
-                print(json.dumps(parsed, indent=2))
-            except json.JSONDecodeError:
-                print(text)
-        else:
-            print(text)
-    else:
-        print(text)
-
-    # Clean up temp dir (parent of first image path)
-    if image_paths:
-        tmp_dir = image_paths[0].parent
-        if "ai_pipeline_pages_" in str(tmp_dir):
-            try:
-                shutil.rmtree(tmp_dir, ignore_errors=True)
-            except OSError:
-                pass
+    rules = asyncio.run(_extract_batches(client, model, image_parts))
+    print(json.dumps(rules, indent=2))
 
 
 if __name__ == "__main__":
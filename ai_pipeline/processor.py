@@ -2,32 +2,81 @@
 
 import sys
 import tempfile
+from collections.abc import Iterator
 from pathlib import Path
 
-from pdf2image import convert_from_path
+import pypdfium2 as pdfium
+from PIL import Image
 
+# Gemini bills per image tile and upload time grows with payload size, so pages
+# are rendered at 150 DPI, capped at 2048 px on the long edge and re-encoded at
+# quality 80. That keeps body text and dimensions legible on letter-size pages
+# while large-format drawings lose some fine detail in exchange for a much
+# smaller request.
+RENDER_DPI = 150
+MAX_LONG_EDGE = 2048
+JPEG_QUALITY = 80
 
-def pdf_to_images(pdf_path: str | Path) -> list[Path]:
-    """
-    Convert each page of a PDF to a JPEG in a temp directory.
-    Returns a list of image paths (page_1.jpg, page_2.jpg, ...).
-    The temp dir is not auto-deleted; caller can remove it when done.
-    """
+
+def _check_pdf(pdf_path: str | Path) -> Path:
     path = Path(pdf_path)
     if not path.exists():
         raise FileNotFoundError(f"PDF not found: {path}")
     if path.suffix.lower() != ".pdf":
         raise ValueError(f"Not a PDF file: {path}")
+    return path
+
+
+def _render_pages(path: Path, out_dir: Path) -> Iterator[Path]:
+    # PDFium renders in-process; close every page and bitmap as soon as the
+    # JPEG is on disk so native buffers don't pile up across a long document.
+    pdf = pdfium.PdfDocument(str(path))
+    try:
+        for i in range(len(pdf)):
+            page = pdf[i]
+            try:
+                bitmap = page.render(scale=RENDER_DPI / 72)
+                try:
+                    out_path = out_dir / f"page_{i + 1}.jpg"
+                    img = bitmap.to_pil()
+                    # thumbnail() is a no-op when the page already fits.
+                    img.thumbnail((MAX_LONG_EDGE, MAX_LONG_EDGE), Image.Resampling.LANCZOS)
+                    img.save(
+                        out_path,
+                        "JPEG",
+                        quality=JPEG_QUALITY,
+                        optimize=True,
+                        progressive=True,
+                    )
+                finally:
+                    bitmap.close()
+            finally:
+                page.close()
+            yield out_path
+    finally:
+        pdf.close()
+
 
+def pdf_to_images(pdf_path: str | Path) -> list[Path]:
+    """
+    Convert each page of a PDF to a JPEG in a temp directory.
+    Returns a list of image paths (page_1.jpg, page_2.jpg, ...).
+    The temp dir is not auto-deleted; caller can remove it when done.
+    """
+    path = _check_pdf(pdf_path)
     tmpdir = tempfile.mkdtemp(prefix="ai_pipeline_pages_")
-    out_dir = Path(tmpdir)
-    images = convert_from_path(str(path), fmt="jpeg")
-    result: list[Path] = []
-    for i, img in enumerate(images, start=1):
-        out_path = out_dir / f"page_{i}.jpg"
-        img.save(out_path, "JPEG")
-        result.append(out_path)
-    return result
+    return list(_render_pages(path, Path(tmpdir)))
+
+
+def iter_pdf_images(pdf_path: str | Path) -> Iterator[Path]:
+    """
+    Yield one JPEG path per page as soon as that page is rendered.
+    Pages live in a temp directory that is removed once the generator is
+    exhausted (or closed), so read each page before moving on.
+    """
+    path = _check_pdf(pdf_path)
+    with tempfile.TemporaryDirectory(prefix="ai_pipeline_pages_") as tmpdir:
+        yield from _render_pages(path, Path(tmpdir))
 
 
 if __name__ == "__main__":
@@ -1,14 +1,24 @@
+import asyncio
+import io
 import json
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 from urllib.parse import unquote_plus
 
 import boto3
+import orjson
+from google import genai
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from specbook.ingestion import generate_rules_json
+from specbook.cache import DEFAULT_CACHE_PREFIX, RulesCache
+from specbook.ingestion import (
+    QuotaLimiter,
+    generate_rules_json_async,
+    resolve_max_concurrency,
+)
 
 
 logger = logging.getLogger()
@@ -26,6 +36,7 @@ TRADES = [
     "steel",
     "tiler",
 ]
+MAX_CONCURRENT_DOWNLOADS = 4
 
 
 def _get_env(name: str, default: str = "") -> str:
@@ -35,6 +46,33 @@ def _get_env(name: str, default: str = "") -> str:
     return value
 
 
+# Loop-agnostic clients live at module scope so warm Lambda invocations reuse
+# them instead of paying for construction and connection setup on every event.
+_S3 = boto3.client("s3")
+
+try:
+    _GOOGLE_API_KEY = _get_env("GOOGLE_API_KEY")
+except ValueError:
+    _GOOGLE_API_KEY = ""
+
+
+def _build_llm(model_name: str, api_key: str) -> ChatGoogleGenerativeAI:
+    # Not cached: the model caches its async transport on the instance, bound
+    # to the event loop it was first used in, and every invocation runs in a
+    # fresh loop via asyncio.run.
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        google_api_key=api_key,
+        response_mime_type="application/json",
+    )
+
+
+# Only used through sync calls (in worker threads), so safe to reuse.
+@lru_cache(maxsize=None)
+def _get_genai_client(api_key: str) -> genai.Client:
+    return genai.Client(api_key=api_key)
+
+
 def _get_bucket_name(record: dict[str, Any]) -> str:
     bucket_name = (
         record.get("s3", {})
@@ -55,44 +93,140 @@ def _get_object_key(record: dict[str, Any]) -> str:
     return unquote_plus(key)
 
 
+async def _process_record(
+    record: dict[str, Any],
+    s3: Any,
+    llm: ChatGoogleGenerativeAI,
+    genai_client: genai.Client,
+    output_prefix: str,
+    cache_prefix: str,
+    download_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+    limiter: QuotaLimiter,
+) -> str | None:
+    bucket_name = _get_bucket_name(record)
+    if not bucket_name:
+        raise ValueError("Missing bucket name in S3 event or env var")
+
+    key = _get_object_key(record)
+    if not key:
+        logger.warning("Skipping record without S3 object key")
+        return None
+    if not key.lower().endswith(".pdf"):
+        # Outputs and cache entries land in the same bucket and fire
+        # this trigger too; only uploaded PDFs need processing.
+        logger.info("Skipping non-PDF object: %s", key)
+        return None
+
+    # Keep the PDF, its chunks and the output in memory; nothing touches /tmp.
+    async with download_semaphore:
+        body = await asyncio.to_thread(
+            lambda: s3.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+        )
+
+    cache = RulesCache(bucket_name, s3_client=s3, prefix=cache_prefix)
+    grouped = await generate_rules_json_async(
+        io.BytesIO(body),
+        llm,
+        TRADES,
+        cache=cache,
+        genai_client=genai_client,
+        stem=Path(key).stem,
+        limiter=limiter,
+        semaphore=llm_semaphore,
+    )
+    del body
+
+    output_name = f"{Path(key).stem}_rules.json"
+    output_key = f"{output_prefix.rstrip('/')}/{output_name}"
+    await asyncio.to_thread(
+        s3.put_object,
+        Bucket=bucket_name,
+        Key=output_key,
+        Body=orjson.dumps(grouped, option=orjson.OPT_INDENT_2),
+        ContentType="application/json",
+    )
+    return output_key
+
+
+async def _process_records(
+    records: list[dict[str, Any]],
+    s3: Any,
+    model_name: str,
+    google_api_key: str,
+    genai_client: genai.Client,
+    output_prefix: str,
+    cache_prefix: str,
+) -> list[str]:
+    # Records run concurrently so one document's downloads and chunking
+    # overlap another's LLM calls; all of them share one concurrency cap and
+    # one quota limiter.
+    llm = _build_llm(model_name, google_api_key)
+    download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    llm_semaphore = asyncio.Semaphore(resolve_max_concurrency(None))
+    limiter = QuotaLimiter.from_env()
+    results = await asyncio.gather(
+        *(
+            _process_record(
+                record,
+                s3,
+                llm,
+                genai_client,
+                output_prefix,
+                cache_prefix,
+                download_semaphore,
+                llm_semaphore,
+                limiter,
+            )
+            for record in records
+        ),
+        return_exceptions=True,
+    )
+
+    # A bad record must not cancel the others: every successful record has
+    # already written its output by now, so only then surface the failures.
+    processed: list[str] = []
+    failures: list[BaseException] = []
+    for record, result in zip(records, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Failed to process %s",
+                _get_object_key(record) or "record",
+                exc_info=result,
+            )
+            failures.append(result)
+        elif result:
+            processed.append(result)
+    if failures:
+        raise failures[0]
+    return processed
+
+
 def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     logger.info("Received event:\n%s", json.dumps(event, indent=2, sort_keys=True))
 
     output_prefix = os.environ.get("OUTPUT_PREFIX", "outputs/")
-    google_api_key = _get_env("GOOGLE_API_KEY")
+    cache_prefix = os.environ.get("CACHE_PREFIX", DEFAULT_CACHE_PREFIX)
+    google_api_key = _GOOGLE_API_KEY or _get_env("GOOGLE_API_KEY")
     model_name = os.environ.get("GOOGLE_MODEL", "gemini-flash-latest")
     logger.info(
         "GOOGLE_API_KEY loaded (set=%s)",
         bool(google_api_key),
     )
 
-    s3 = boto3.client("s3")
-    llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=google_api_key)
+    genai_client = _get_genai_client(google_api_key)
 
     records = event.get("Records", [])
-    processed: list[str] = []
-
-    for record in records:
-        bucket_name = _get_bucket_name(record)
-        if not bucket_name:
-            raise ValueError("Missing bucket name in S3 event or env var")
-
-        key = _get_object_key(record)
-        if not key:
-            logger.warning("Skipping record without S3 object key")
-            continue
-
-        local_pdf = Path("/tmp") / Path(key).name
-        s3.download_file(bucket_name, key, str(local_pdf))
-
-        grouped = generate_rules_json(local_pdf, llm, TRADES)
-
-        output_name = f"{Path(key).stem}_rules.json"
-        output_key = f"{output_prefix.rstrip('/')}/{output_name}"
-        output_path = Path("/tmp") / output_name
-        output_path.write_text(json.dumps(grouped, indent=2))
-        s3.upload_file(str(output_path), bucket_name, output_key)
-
-        processed.append(output_key)
+    processed = asyncio.run(
+        _process_records(
+            records,
+            _S3,
+            model_name,
+            google_api_key,
+            genai_client,
+            output_prefix,
+            cache_prefix,
+        )
+    )
 
     return {"statusCode": 200, "body": json.dumps({"processed": processed})}
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+from typing import Any
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PREFIX = "cache/"
+
+
+def make_cache_key(*parts: bytes) -> str:
+    """SHA-256 over the parts, each prefixed with its 8-byte length.
+
+    Length-prefixing keeps ``(b"ab", b"c")`` and ``(b"a", b"bc")`` from
+    hashing to the same key.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class RulesCache:
+    """Content-addressed store of parsed LLM payloads, kept as JSON in S3."""
+
+    def __init__(
+        self,
+        bucket: str,
+        s3_client: Any | None = None,
+        prefix: str = DEFAULT_CACHE_PREFIX,
+    ) -> None:
+        self.bucket = bucket
+        self.prefix = f"{prefix.rstrip('/')}/"
+        self._s3 = s3_client or boto3.client("s3")
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        # Any failure to read or decode an entry is treated as a miss.
+        try:
+            response = self._s3.get_object(Bucket=self.bucket, Key=self._object_key(key))
+            body = response["Body"].read()
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.warning("Cache read failed for %s: %s", key, exc)
+            return None
+        except BotoCoreError as exc:
+            logger.warning("Cache read failed for %s: %s", key, exc)
+            return None
+        try:
+            return json.loads(body)
+        except ValueError as exc:
+            logger.warning("Ignoring corrupt cache entry %s: %s", key, exc)
+            return None
+
+    def put(self, key: str, payload: dict) -> None:
+        try:
+            self._s3.put_object(
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                Body=json.dumps(payload).encode("utf-8"),
+                ContentType="application/json",
+            )
+        except (BotoCoreError, ClientError) as exc:
+            logger.warning("Cache write failed for %s: %s", key, exc)
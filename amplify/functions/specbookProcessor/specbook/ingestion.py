@@ -1,13 +1,28 @@
+import asyncio
 import base64
+import concurrent.futures
+import io
 import json
 import logging
-import time
+import os
+import re
+import threading
+from collections.abc import Iterator
 from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
+from typing import BinaryIO
 
+from aiolimiter import AsyncLimiter
+from google import genai
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
-from pypdf import PdfReader, PdfWriter
+import msgspec
+import pikepdf
+import pypdfium2 as pdfium
+
+from specbook.cache import RulesCache, make_cache_key
 
 
 logger = logging.getLogger(__name__)
@@ -15,20 +30,78 @@ logger = logging.getLogger(__name__)
 DEFAULT_CHUNK_SIZE = 5
 DEFAULT_OVERLAP = 1
 DEFAULT_MAX_RETRIES = 5
-DEFAULT_MAX_CONCURRENCY = 4
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+QUEUE_SIZE_PER_WORKER = 2
+QUEUE_PUT_POLL_SECONDS = 0.5
+DEFAULT_MAX_CONCURRENCY = 16
+MAX_CONCURRENCY_ENV = "LLM_MAX_CONCURRENCY"
+DEFAULT_QPM = 60
+DEFAULT_TPM = 1_000_000
+QPM_ENV = "LLM_QPM"
+TPM_ENV = "LLM_TPM"
+MIN_CHUNK_TEXT_CHARS = 200
+# Roughly a letter page scanned at 100 DPI; logos and stamps are far smaller.
+MIN_IMAGE_PIXELS = 800 * 1000
+RULE_TEXT_PATTERN = re.compile(
+    r"\bshall\b|\bmust\b|\d+\s*(in|ft|mm|psi)\b",
+    re.IGNORECASE,
+)
 PROMPT_TRADE_PLACEHOLDER = "{{TRADE_LIST}}"
 PROMPT_PATH = Path(__file__).resolve().parent / "prompts" / "rules_prompt.txt"
+# Bump whenever rules_prompt.txt or the payload handling changes so cached
+# responses from the old prompt are no longer served.
+PROMPT_VERSION = "v2"
 _PROMPT_TEMPLATE: str | None = None
+_PDFIUM_LOCK = threading.Lock()
+
+
+_Scalar = str | int | float | None
+
+
+def _as_text(value: _Scalar) -> str:
+    return "" if value is None else str(value)
+
+
+class Rule(msgspec.Struct):
+    # Models sometimes emit numbers or nulls where strings are expected;
+    # accept them and normalise to strings rather than rejecting the chunk.
+    rule_id: _Scalar
+    description: _Scalar
+    trade: _Scalar = ""
+    requirements: list[_Scalar] | None = []
+    source_pages: list[int] = []
+    source_chunk: str = ""
+
+    def __post_init__(self) -> None:
+        self.trade = _as_text(self.trade).strip()
+        self.rule_id = _as_text(self.rule_id)
+        self.description = _as_text(self.description)
+        self.requirements = [
+            str(req) for req in self.requirements or [] if req is not None
+        ]
+
+
+class RulesEnvelope(msgspec.Struct):
+    rules: list[Rule] = []
+
+
+_RULES_DECODER = msgspec.json.Decoder(RulesEnvelope, strict=False)
+_JSON_DECODER = json.JSONDecoder()
+_OUTPUT_FIELDS = (
+    "rule_id",
+    "description",
+    "requirements",
+    "source_pages",
+    "source_chunk",
+)
+_output_values = attrgetter(*_OUTPUT_FIELDS)
 
 
 @dataclass
-class Rule:
-    trade: str
-    rule_id: str
-    description: str
-    requirements: list[str]
-    source_pages: list[int]
-    source_chunk: str
+class PdfChunk:
+    name: str
+    data: bytes
 
 
 def _validate_chunk_params(chunk_size: int, overlap: int) -> None:
@@ -47,6 +120,56 @@ def _load_prompt_template() -> str:
     return _PROMPT_TEMPLATE
 
 
+def iter_pdf_chunks(
+    input_pdf: str | Path | BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_OVERLAP,
+    stem: str | None = None,
+) -> Iterator[PdfChunk]:
+    """Yield overlapping in-memory chunks of a PDF as each one is written.
+
+    ``input_pdf`` may be a path or a readable binary stream; streams need a
+    ``stem`` to name the chunks.
+    """
+    if isinstance(input_pdf, (str, Path)):
+        input_path = Path(input_pdf)
+        if not input_path.exists() or not input_path.is_file():
+            raise FileNotFoundError(f"PDF not found: {input_path}")
+        stem = stem or input_path.stem
+        source = input_path
+    else:
+        if not stem:
+            raise ValueError("stem is required when input_pdf is a stream")
+        source = input_pdf
+    _validate_chunk_params(chunk_size, overlap)
+
+    step = chunk_size - overlap
+    # pikepdf copies pages by reference inside libqpdf, so no Python-level
+    # page clone happens. deterministic_id keeps identical chunks
+    # byte-identical across runs, which the rules cache relies on.
+    with pikepdf.open(source) as src:
+        total_pages = len(src.pages)
+        for start in range(0, total_pages, step):
+            end = min(start + chunk_size, total_pages)
+            chunk_index = (start // step) + 1
+            buffer = io.BytesIO()
+            with pikepdf.Pdf.new() as dst:
+                dst.pages.extend(src.pages[start:end])
+                dst.save(buffer, linearize=False, deterministic_id=True)
+            yield PdfChunk(f"{stem}_chunk_{chunk_index}.pdf", buffer.getvalue())
+
+
+def split_pdf(
+    input_pdf: str | Path | BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_OVERLAP,
+    stem: str | None = None,
+) -> list[PdfChunk]:
+    return list(
+        iter_pdf_chunks(input_pdf, chunk_size=chunk_size, overlap=overlap, stem=stem)
+    )
+
+
 def chunk_pdf(
     input_pdf: str | Path,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
@@ -54,9 +177,7 @@ def chunk_pdf(
     output_dir: str | Path | None = None,
 ) -> list[Path]:
     input_path = Path(input_pdf)
-    if not input_path.exists() or not input_path.is_file():
-        raise FileNotFoundError(f"PDF not found: {input_path}")
-    _validate_chunk_params(chunk_size, overlap)
+    chunks = split_pdf(input_path, chunk_size=chunk_size, overlap=overlap)
 
     if output_dir is None:
         output_path = input_path.parent / f"{input_path.stem}_chunks"
@@ -64,155 +185,399 @@ def chunk_pdf(
         output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    reader = PdfReader(str(input_path))
-    total_pages = len(reader.pages)
     chunk_paths: list[Path] = []
-
-    step = chunk_size - overlap
-    for start in range(0, total_pages, step):
-        writer = PdfWriter()
-        end = min(start + chunk_size, total_pages)
-        for page_index in range(start, end):
-            writer.add_page(reader.pages[page_index])
-
-        chunk_index = (start // step) + 1
-        chunk_file = output_path / f"{input_path.stem}_chunk_{chunk_index}.pdf"
-        with chunk_file.open("wb") as handle:
-            writer.write(handle)
+    for chunk in chunks:
+        chunk_file = output_path / chunk.name
+        chunk_file.write_bytes(chunk.data)
         chunk_paths.append(chunk_file)
-
     return chunk_paths
 
 
-def build_rules_prompt(trades: list[str]) -> str:
+def _chunk_text(data: bytes) -> str:
+    # PDFium is not thread-safe and records are filtered from concurrent
+    # threads, so every call into it is serialised.
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            parts: list[str] = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                parts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return "".join(parts)
+        finally:
+            pdf.close()
+
+
+def _chunk_has_large_images(data: bytes) -> bool:
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        for page in pdf.pages:
+            for image in page.images.values():
+                width = int(image.get("/Width", 0))
+                height = int(image.get("/Height", 0))
+                if width * height >= MIN_IMAGE_PIXELS:
+                    return True
+    return False
+
+
+def _chunk_passes_filter(data: bytes) -> bool:
+    if _chunk_has_large_images(data):
+        return True
+    text = _chunk_text(data)
+    if len(text) < MIN_CHUNK_TEXT_CHARS:
+        return False
+    return RULE_TEXT_PATTERN.search(text) is not None
+
+
+def _chunk_may_have_rules(chunk: PdfChunk) -> bool:
+    # Covers, tables of contents and blank appendices rarely hold rules and
+    # cost a full LLM call each, so chunks with little text or no rule-like
+    # wording are skipped.
+    #
+    # Scanned pages and raster drawings carry their rules in images rather
+    # than the text layer, so a chunk with any page-sized image is always
+    # sent. Small images (logos, stamps) are ignored so a header logo on every
+    # page doesn't disable the filter. Tradeoff: vector-only drawing sheets
+    # whose labels don't match RULE_TEXT_PATTERN are still skipped.
+    #
+    # This is only a cost saving, so any failure to inspect the chunk sends it.
+    try:
+        return _chunk_passes_filter(chunk.data)
+    except Exception as exc:
+        logger.warning("Chunk %s: could not inspect, sending anyway: %s", chunk.name, exc)
+        return True
+
+
+@lru_cache(maxsize=8)
+def build_rules_prompt(trades: tuple[str, ...]) -> str:
     trade_list = ", ".join(trades)
     prompt_template = _load_prompt_template()
     return prompt_template.replace(PROMPT_TRADE_PLACEHOLDER, trade_list)
 
 
-def _decode_rules_json(raw_text: str) -> dict:
-    start = raw_text.find("{")
-    end = raw_text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
+def _decode_rules_json(raw_text: str) -> RulesEnvelope:
+    text = raw_text.strip()
+    # In JSON mode the whole response is the object: parse and validate in one
+    # pass (lax mode accepts e.g. "3" for a page number).
+    try:
+        return _RULES_DECODER.decode(text)
+    except msgspec.ValidationError:
+        raise
+    except msgspec.DecodeError:
+        pass
+    # Otherwise parse from the first "{" and stop where that object ends, so
+    # trailing text or braces inside strings can't corrupt the slice.
+    start = text.find("{")
+    if start == -1:
         raise ValueError("Model response did not contain JSON object.")
-    return json.loads(raw_text[start : end + 1])
+    payload, _ = _JSON_DECODER.raw_decode(text, start)
+    return msgspec.convert(payload, RulesEnvelope, strict=False)
 
 
-def _rules_from_payload(payload: dict, source_chunk: str) -> list[Rule]:
-    rules: list[Rule] = []
-    for item in payload.get("rules", []):
-        trade = str(item.get("trade", "")).strip()
-        rules.append(
-            Rule(
-                trade=trade,
-                rule_id=str(item["rule_id"]),
-                description=str(item["description"]),
-                requirements=[str(req) for req in item.get("requirements", [])],
-                source_pages=[int(p) for p in item.get("source_pages", [])],
-                source_chunk=str(item.get("source_chunk", source_chunk)),
-            )
+def _chunk_rules(envelope: RulesEnvelope, source_chunk: str) -> list[Rule]:
+    for rule in envelope.rules:
+        if not rule.source_chunk:
+            rule.source_chunk = source_chunk
+    return envelope.rules
+
+
+def _chunk_cache_key(
+    llm: ChatGoogleGenerativeAI,
+    pdf_bytes: bytes,
+    trades: list[str],
+) -> str:
+    return make_cache_key(
+        str(getattr(llm, "model", "")).encode("utf-8"),
+        PROMPT_VERSION.encode("utf-8"),
+        pdf_bytes,
+        json.dumps(sorted(trades)).encode("utf-8"),
+    )
+
+
+def _build_message(
+    trades: list[str],
+    file_uri: str | None = None,
+    pdf_bytes: bytes | None = None,
+) -> list[HumanMessage]:
+    prompt = build_rules_prompt(tuple(trades))
+    if file_uri is not None:
+        media = {"type": "media", "mime_type": "application/pdf", "file_uri": file_uri}
+    elif pdf_bytes is not None:
+        encoded_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
+        media = {"type": "media", "mime_type": "application/pdf", "data": encoded_pdf}
+    else:
+        raise ValueError("Either file_uri or pdf_bytes is required")
+    return [HumanMessage(content=[{"type": "text", "text": prompt}, media])]
+
+
+def _upload_chunk(genai_client: genai.Client, chunk: PdfChunk):
+    return genai_client.files.upload(
+        file=io.BytesIO(chunk.data),
+        config={"mime_type": "application/pdf", "display_name": chunk.name},
+    )
+
+
+def _delete_uploaded(genai_client: genai.Client, name: str) -> None:
+    try:
+        genai_client.files.delete(name=name)
+    except Exception as exc:
+        logger.warning("Could not delete uploaded file %s: %s", name, exc)
+
+
+class QuotaLimiter:
+    """Paces LLM calls to a requests-per-minute and tokens-per-minute budget.
+
+    Requests go through a leaky bucket sized to ``qpm``. Token usage is only
+    known once a response arrives, so each call reserves a single token up
+    front and the remainder is charged afterwards; when the minute's token
+    budget is spent, new calls wait for it to drain.
+    """
+
+    def __init__(self, qpm: int, tpm: int) -> None:
+        if qpm <= 0 or tpm <= 0:
+            raise ValueError("qpm and tpm must be positive")
+        self._requests = AsyncLimiter(qpm, 60)
+        self._tokens = AsyncLimiter(tpm, 60)
+        self._tpm = tpm
+
+    @classmethod
+    def from_env(cls) -> "QuotaLimiter":
+        return cls(
+            qpm=int(os.environ.get(QPM_ENV, DEFAULT_QPM)),
+            tpm=int(os.environ.get(TPM_ENV, DEFAULT_TPM)),
         )
-    return rules
-
-
-def _build_message(chunk_path: Path, trades: list[str]) -> list[HumanMessage]:
-    prompt = build_rules_prompt(trades)
-    pdf_bytes = chunk_path.read_bytes()
-    encoded_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
-    return [
-        HumanMessage(
-            content=[
-                {"type": "text", "text": prompt},
-                {"type": "media", "mime_type": "application/pdf", "data": encoded_pdf},
-            ]
+
+    async def acquire(self) -> None:
+        await self._tokens.acquire(1)
+        await self._requests.acquire()
+
+    async def charge_tokens(self, total_tokens: int) -> None:
+        remaining = min(total_tokens - 1, self._tpm)
+        if remaining > 0:
+            await self._tokens.acquire(remaining)
+
+
+def resolve_max_concurrency(max_concurrency: int | None) -> int:
+    if max_concurrency is None:
+        max_concurrency = int(
+            os.environ.get(MAX_CONCURRENCY_ENV, DEFAULT_MAX_CONCURRENCY)
         )
-    ]
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be positive")
+    return max_concurrency
 
 
-def extract_rules_for_chunks_parallel(
+async def _extract_rules_for_chunk(
     llm: ChatGoogleGenerativeAI,
-    chunk_paths: list[Path],
+    chunk: PdfChunk,
     trades: list[str],
-    max_retries: int = DEFAULT_MAX_RETRIES,
-    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
-) -> list[list[Rule]]:
-    if not chunk_paths:
-        return []
-
-    messages = [_build_message(chunk_path, trades) for chunk_path in chunk_paths]
-    results: list[list[Rule] | None] = [None] * len(chunk_paths)
-    remaining = list(range(len(chunk_paths)))
-
-    for attempt in range(1, max_retries + 1):
-        logger.info(
-            "Parallel batch attempt %d/%d for %d chunks",
-            attempt,
-            max_retries,
-            len(remaining),
-        )
-        batch_messages = [messages[i] for i in remaining]
-        responses = llm.batch(batch_messages, config={"max_concurrency": max_concurrency})
+    semaphore: asyncio.Semaphore,
+    limiter: QuotaLimiter,
+    max_retries: int,
+    cache: RulesCache | None = None,
+    genai_client: genai.Client | None = None,
+) -> list[Rule]:
+    chunk_name = chunk.name
+
+    cache_key = None
+    if cache is not None:
+        cache_key = _chunk_cache_key(llm, chunk.data, trades)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            try:
+                envelope = msgspec.convert(cached, RulesEnvelope, strict=False)
+            except msgspec.ValidationError as exc:
+                logger.warning(
+                    "Chunk %s: ignoring invalid cache entry: %s", chunk_name, exc
+                )
+            else:
+                logger.info("Chunk %s: cache hit", chunk_name)
+                return _chunk_rules(envelope, chunk_name)
+
+    uploaded = None
+    if genai_client is not None:
+        # Upload once and reference the file by URI on every attempt instead of
+        # inlining a base64 copy of the PDF in each request.
+        try:
+            async with semaphore:
+                uploaded = await asyncio.to_thread(_upload_chunk, genai_client, chunk)
+        except Exception as exc:
+            logger.warning("Chunk %s: upload failed, sending inline: %s", chunk_name, exc)
+    if uploaded is not None:
+        message = _build_message(trades, file_uri=uploaded.uri)
+    else:
+        message = _build_message(trades, pdf_bytes=chunk.data)
 
-        next_remaining: list[int] = []
-        for idx, response in zip(remaining, responses):
-            chunk_name = chunk_paths[idx].name
+    try:
+        for attempt in range(1, max_retries + 1):
             try:
-                payload = _decode_rules_json(response.content)
-                results[idx] = _rules_from_payload(payload, chunk_name)
+                async with semaphore:
+                    await limiter.acquire()
+                    response = await llm.ainvoke(message)
+                usage = response.usage_metadata or {}
+                await limiter.charge_tokens(usage.get("total_tokens", 0))
+                envelope = _decode_rules_json(response.content)
             except Exception as exc:
                 logger.warning(
-                    "Chunk %s: parse failed on attempt %d: %s",
+                    "Chunk %s: attempt %d/%d failed: %s",
                     chunk_name,
                     attempt,
+                    max_retries,
                     exc,
                 )
-                next_remaining.append(idx)
-
-        remaining = next_remaining
-        if not remaining:
-            break
-        if attempt < max_retries:
-            time.sleep(1.0 * attempt)
-
-    if remaining:
-        failed_chunks = ", ".join(chunk_paths[i].name for i in remaining)
-        logger.warning("Proceeding with empty rules for failed chunks: %s", failed_chunks)
+                # The limiter allows bursts up to QPM, so back off explicitly
+                # rather than hammering a 429/5xx with immediate retries.
+                if attempt < max_retries:
+                    backoff = RETRY_BACKOFF_BASE * 2 ** (attempt - 1)
+                    await asyncio.sleep(min(backoff, RETRY_BACKOFF_MAX))
+                continue
+
+            # Cache before filling in source_chunk so a re-uploaded file under a
+            # new name doesn't inherit the old chunk names.
+            if cache is not None:
+                await asyncio.to_thread(
+                    cache.put, cache_key, msgspec.to_builtins(envelope)
+                )
+            return _chunk_rules(envelope, chunk_name)
+    finally:
+        if uploaded is not None:
+            await asyncio.to_thread(_delete_uploaded, genai_client, uploaded.name)
 
-    return [rules or [] for rules in results]
+    logger.warning("Proceeding with empty rules for failed chunk: %s", chunk_name)
+    return []
 
 
 def group_rules_by_trade(rules: list[Rule]) -> dict[str, list[dict]]:
     grouped: dict[str, list[dict]] = {}
     for rule in rules:
         grouped.setdefault(rule.trade or "unspecified", []).append(
-            {
-                "rule_id": rule.rule_id,
-                "description": rule.description,
-                "requirements": rule.requirements,
-                "source_pages": rule.source_pages,
-                "source_chunk": rule.source_chunk,
-            }
+            dict(zip(_OUTPUT_FIELDS, _output_values(rule)))
         )
     return grouped
 
 
-def generate_rules_json(
-    input_pdf: str | Path,
+async def generate_rules_json_async(
+    input_pdf: str | Path | BinaryIO,
     llm: ChatGoogleGenerativeAI,
     trades: list[str],
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     overlap: int = DEFAULT_OVERLAP,
     max_retries: int = DEFAULT_MAX_RETRIES,
-    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_concurrency: int | None = None,
+    cache: RulesCache | None = None,
+    genai_client: genai.Client | None = None,
+    stem: str | None = None,
+    limiter: QuotaLimiter | None = None,
+    skip_sparse_chunks: bool = True,
+    semaphore: asyncio.Semaphore | None = None,
 ) -> dict[str, list[dict]]:
-    chunk_paths = chunk_pdf(input_pdf, chunk_size=chunk_size, overlap=overlap)
-    rules_per_chunk = extract_rules_for_chunks_parallel(
-        llm,
-        chunk_paths,
-        trades,
-        max_retries=max_retries,
-        max_concurrency=max_concurrency,
+    loop = asyncio.get_running_loop()
+    concurrency = resolve_max_concurrency(max_concurrency)
+    # Callers processing several documents pass one shared semaphore so the
+    # concurrency cap applies across all of them, not per document.
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(concurrency)
+    if limiter is None:
+        limiter = QuotaLimiter.from_env()
+    # Bounded so a fast splitter can't pile every chunk of every document in
+    # memory ahead of the LLM calls; each chunk carries its own copy of the
+    # shared fonts and resources.
+    queue: asyncio.Queue[tuple[int, PdfChunk] | None] = asyncio.Queue(
+        maxsize=QUEUE_SIZE_PER_WORKER * concurrency
+    )
+    cancelled = threading.Event()
+    results: dict[int, list[Rule]] = {}
+
+    def put(item: tuple[int, PdfChunk] | None) -> bool:
+        # Block the splitter thread until there is room, but give up if the
+        # consumers have stopped so it never waits on a queue nobody drains.
+        if cancelled.is_set():
+            return False
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=QUEUE_PUT_POLL_SECONDS)
+                return True
+            except concurrent.futures.TimeoutError:
+                if cancelled.is_set():
+                    future.cancel()
+                    return False
+
+    # Splitting runs in a worker thread and hands each chunk over as soon as
+    # it is written, so the first LLM calls start while later chunks are
+    # still being cut.
+    def produce() -> None:
+        try:
+            chunks = iter_pdf_chunks(
+                input_pdf, chunk_size=chunk_size, overlap=overlap, stem=stem
+            )
+            for index, chunk in enumerate(chunks):
+                # Chunk names are assigned before filtering, so source_chunk
+                # still points at the same pages for the chunks that are sent.
+                if skip_sparse_chunks and not _chunk_may_have_rules(chunk):
+                    logger.info("Skipping chunk without rule text: %s", chunk.name)
+                    continue
+                if not put((index, chunk)):
+                    return
+        finally:
+            for _ in range(concurrency):
+                if not put(None):
+                    break
+
+    async def consume() -> None:
+        try:
+            while (item := await queue.get()) is not None:
+                index, chunk = item
+                results[index] = await _extract_rules_for_chunk(
+                    llm,
+                    chunk,
+                    trades,
+                    semaphore,
+                    limiter,
+                    max_retries,
+                    cache=cache,
+                    genai_client=genai_client,
+                )
+        except BaseException:
+            cancelled.set()
+            raise
+
+    logger.info("Extracting rules with %d workers", concurrency)
+    await asyncio.gather(
+        asyncio.to_thread(produce),
+        *(consume() for _ in range(concurrency)),
     )
 
-    all_rules = [rule for rules in rules_per_chunk for rule in rules]
+    all_rules = [rule for index in sorted(results) for rule in results[index]]
     return group_rules_by_trade(all_rules)
+
+
+def generate_rules_json(
+    input_pdf: str | Path | BinaryIO,
+    llm: ChatGoogleGenerativeAI,
+    trades: list[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_OVERLAP,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    max_concurrency: int | None = None,
+    cache: RulesCache | None = None,
+    genai_client: genai.Client | None = None,
+    stem: str | None = None,
+    skip_sparse_chunks: bool = True,
+) -> dict[str, list[dict]]:
+    return asyncio.run(
+        generate_rules_json_async(
+            input_pdf,
+            llm,
+            trades,
+            chunk_size=chunk_size,
+            overlap=overlap,
+            max_retries=max_retries,
+            max_concurrency=max_concurrency,
+            cache=cache,
+            genai_client=genai_client,
+            stem=stem,
+            skip_sparse_chunks=skip_sparse_chunks,
+        )
+    )
@@ -6,5 +6,6 @@ export const storage = defineStorage({
   access: (allow) => ({
     "uploads/*": [allow.resource(specbookProcessor).to(["read", "write"])],
     "outputs/*": [allow.resource(specbookProcessor).to(["read", "write"])],
+    "cache/*": [allow.resource(specbookProcessor).to(["read", "write"])],
   }),
 });